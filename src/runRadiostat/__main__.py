@@ -1,8 +1,39 @@
-from runRadiostat.guided_flow import GuidedFlowApp
+import os
+import sys
+import argparse
+from runRadiostat.collector import DEFAULT_PORT
 
 def main():
+    parser = argparse.ArgumentParser(prog="runRadiostat")
+    parser.add_argument("--health-check", action="store_true", help="Check every attached Rodeostat and exit")
+    parser.add_argument("--port", dest="ports", action="append", help="Serial port to health check (repeatable, default: all detected)")
+    parser.add_argument("--simulate", action="store_true", help="Use a simulated device instead of hardware")
+    subparsers = parser.add_subparsers(dest="command")
+
+    collect = subparsers.add_parser("collect", help="Run the teacher-machine collector that stations upload runs to")
+    collect.add_argument("--host", default="0.0.0.0", help="Address to listen on (use 127.0.0.1 for local testing)")
+    collect.add_argument("--port", type=int, default=DEFAULT_PORT)
+    collect.add_argument("--store", default="collected", help="Directory for the collected runs and index")
+
+    args = parser.parse_args()
+
+    if args.simulate:
+        os.environ["RADIOSTAT_SIMULATE"] = "1"
+
+    if args.health_check:
+        from runRadiostat.health_check import check_all_devices, format_report
+        results = check_all_devices(args.ports)
+        print(format_report(results))
+        sys.exit(0 if results and all(r["ok"] for r in results) else 1)
+
+    if args.command == "collect":
+        from runRadiostat.collector import run_collector
+        run_collector(args.host, args.port, args.store)
+        return
+
+    from runRadiostat.guided_flow import GuidedFlowApp
     app = GuidedFlowApp()
     app.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,21 +1,102 @@
 import os
 import csv
+import json
 from datetime import datetime
 from potentiostat import Potentiostat
+from runRadiostat.collector import station_name
 import matplotlib.pyplot as plt
 
-def run_beaker_test():
-    port = '/dev/tty.usbmodem1101'       # Serial port for potentiostat device
+DEFAULT_PORT = '/dev/tty.usbmodem1101'  # Serial port for potentiostat device
+
+AUTO_RANGE = 'auto'         # Pass as curr_range to pick the range from a pre-scan
+PRESCAN_SPEEDUP = 4.0       # Pre-scan runs this many times faster than the main sweep
+AUTO_RANGE_HEADROOM = 1.5   # Chosen range must cover this multiple of the expected peak
+CLIP_FRACTION = 0.98        # Currents this close to the range limit count as clipped
+
+
+def range_to_uA(curr_range):
+    """Converts a current range name such as '100nA' or '10000uA' to µA."""
+    if curr_range.endswith('nA'):
+        return float(curr_range[:-2]) / 1000.0
+    if curr_range.endswith('uA'):
+        return float(curr_range[:-2])
+    raise ValueError(f'unknown current range: {curr_range}')
+
+
+def choose_curr_range(peak_uA, all_ranges, headroom=AUTO_RANGE_HEADROOM):
+    """Tightest range covering peak_uA with headroom, or the largest range if none does."""
+    ranges = sorted(all_ranges, key=range_to_uA)
+    for curr_range in ranges:
+        if range_to_uA(curr_range) >= abs(peak_uA) * headroom:
+            return curr_range
+    return ranges[-1]
+
+
+def next_curr_range(curr_range, all_ranges):
+    """Next larger range, or None if curr_range is already the largest."""
+    ranges = sorted(all_ranges, key=range_to_uA)
+    index = ranges.index(curr_range)
+    return ranges[index + 1] if index + 1 < len(ranges) else None
+
+
+def is_clipped(curr, curr_range, fraction=CLIP_FRACTION):
+    limit = range_to_uA(curr_range) * fraction
+    return any(abs(c) >= limit for c in curr)
+
+
+def prescan_peak_current(dev, test_name, test_param, volt_per_sec, sample_rate):
+    """
+    Runs a short, fast sweep over the same voltage window on the largest current range
+    and returns the expected peak |current| (µA) of the main run. The plating and stripping
+    peaks are diffusion peaks that grow with sqrt(scan rate), so the fast peak is scaled
+    back by sqrt(PRESCAN_SPEEDUP). Charging current grows linearly with scan rate and is
+    over-estimated, which only errs towards a larger range. The sample rate is raised by
+    the same speedup so the peak is sampled at the same voltage spacing as the main run.
+    """
+
+    prescan_param = dict(test_param)
+    prescan_param['period'] = max(int(test_param['period'] / PRESCAN_SPEEDUP), 1)
+    prescan_param['numCycles'] = 1
+
+    dev.set_curr_range(max(dev.get_all_curr_range(), key=range_to_uA))
+    dev.set_sample_rate(sample_rate * PRESCAN_SPEEDUP)
+    dev.set_param(test_name, prescan_param)
+    t, volt, curr = dev.run_test(test_name, display=None, filename=None)
+
+    # Restore the main run's settings
+    dev.set_sample_rate(sample_rate)
+    dev.set_param(test_name, test_param)
+    prescan_peak = max(map(abs, curr), default=0.0)
+    print(f"Pre-scan at {volt_per_sec * PRESCAN_SPEEDUP:.2f} V/s: peak current {prescan_peak:.1f} uA")
+    return prescan_peak / PRESCAN_SPEEDUP ** 0.5
+
+
+def metadata_path(data_filename):
+    """Sidecar JSON next to a cv_data_*.txt file holding the run's waveform parameters."""
+    return os.path.splitext(data_filename)[0] + '.json'
+
+
+def load_run_metadata(data_filename):
+    """Returns the run's recorded parameters, or None for runs saved before they were recorded."""
+    try:
+        with open(metadata_path(data_filename), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def run_beaker_test(port=DEFAULT_PORT, curr_range=AUTO_RANGE, simulate=None, volt_per_sec=1.00,
+                    cell=None, electrolyte=None, output_dir=None):
     datafile = 'data.txt'       # Output file for time, curr, volt data
 
     test_name = 'cyclic'        # The name of the test to run
-    curr_range = '10000uA'        # The name of the current range [-100uA, +100uA]
+    # curr_range                # Current range name, e.g. '1000uA' for [-1000uA, +1000uA], or 'auto'
     sample_rate = 100.0         # The number of samples/second to collect
 
     volt_min = -1.2             # The minimum voltage in the waveform (V)
     volt_max =  -0.4             # The maximum voltage in the waveform (V)
     #volt_per_sec = 0.050        # The rate at which to transition from volt_min to volt_max (V/s)
-    volt_per_sec = 1.00         # The rate at which to transition from volt_min to volt_max (V/s)
+    # volt_per_sec              # The rate at which to transition from volt_min to volt_max (V/s)
     num_cycles = 1              # The number of cycle in the waveform
 
     # Convert parameters to amplitude, offset, period, phase shift for triangle waveform
@@ -38,28 +119,74 @@ def run_beaker_test():
 
     # Generate timestamp for filenames
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    output_dir = os.path.join(os.path.dirname(__file__), "../../output")
+    if output_dir is None:
+        output_dir = os.path.join(os.path.dirname(__file__), "../../output")
     os.makedirs(output_dir, exist_ok=True)
 
     data_filename = os.path.join(output_dir, f"cv_data_{timestamp}.txt")
     plot1_filename = os.path.join(output_dir, f"cv_time_plot_{timestamp}.png")
     plot2_filename = os.path.join(output_dir, f"cv_iv_plot_{timestamp}.png")
 
-    # Create potentiostat object and set current range, sample rate and test parameters
-    dev = Potentiostat(port)     
-    dev.set_curr_range(curr_range)   
+    # Set RADIOSTAT_SIMULATE=1 to run without a Rodeostat attached
+    if simulate is None:
+        simulate = bool(os.environ.get("RADIOSTAT_SIMULATE"))
+
+    # Create potentiostat object and set sample rate and test parameters
+    if simulate:
+        from runRadiostat.simulated_device import SimulatedPotentiostat
+        dev = SimulatedPotentiostat(port)
+    else:
+        dev = Potentiostat(port)
     dev.set_sample_rate(sample_rate)
     dev.set_param(test_name,test_param)
 
+    # Pick the tightest current range that fits this cell
+    auto_range = curr_range == AUTO_RANGE
+    if auto_range:
+        peak_uA = prescan_peak_current(dev, test_name, test_param, volt_per_sec, sample_rate)
+        curr_range = choose_curr_range(peak_uA, dev.get_all_curr_range())
+        print(f"Auto-selected current range: {curr_range}")
+    dev.set_curr_range(curr_range)
+
     # Run cyclic voltammetry test
     t, volt, curr = dev.run_test(test_name, display='data', filename=None)
 
+    # If the main run clipped, retry once on the next larger range
+    if is_clipped(curr, curr_range):
+        larger_range = next_curr_range(curr_range, dev.get_all_curr_range())
+        if auto_range and larger_range:
+            print(f"Current clipped at {curr_range}, retrying at {larger_range}")
+            curr_range = larger_range
+            dev.set_curr_range(curr_range)
+            t, volt, curr = dev.run_test(test_name, display='data', filename=None)
+        else:
+            print(f"Warning: current clipped at the {curr_range} range")
+
     # Save data to file
     with open(data_filename, 'w', newline='') as f:
         writer = csv.writer(f, delimiter='\t')
         writer.writerow(['Time (s)', 'Voltage (V)', 'Current (uA)'])
         writer.writerows(zip(t, volt, curr))
 
+    # Record how the run was taken so runs can be grouped later (e.g. scan-rate series)
+    metadata = {
+            'timestamp'    : timestamp,
+            'cell'         : cell,
+            'electrolyte'  : electrolyte,
+            'station'      : station_name(),
+            'test_name'    : test_name,
+            'curr_range'   : curr_range,
+            'sample_rate'  : sample_rate,
+            'volt_min'     : volt_min,
+            'volt_max'     : volt_max,
+            'volt_per_sec' : volt_per_sec,
+            'num_cycles'   : num_cycles,
+            'test_param'   : test_param,
+            'simulated'    : bool(simulate),
+            }
+    with open(metadata_path(data_filename), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
     # plot results using matplotlib
     plt.figure(1)
     plt.subplot(211)
@@ -85,4 +212,6 @@ def run_beaker_test():
 
     print(f"Saved data to: {data_filename}")
     print(f"Saved plot (time) to: {plot1_filename}")
-    print(f"Saved plot (IV) to: {plot2_filename}")
\ No newline at end of file
+    print(f"Saved plot (IV) to: {plot2_filename}")
+
+    return data_filename
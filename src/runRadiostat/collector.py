@@ -0,0 +1,339 @@
+import os
+import re
+import json
+import gzip
+import zlib
+import time
+import uuid
+import random
+import socket
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+DEFAULT_PORT = 8765
+BATCH_SIZE = 20
+MIN_BACKOFF = 1.0      # Seconds to wait after the first failed upload
+MAX_BACKOFF = 60.0     # Upper bound on the wait between retries
+REJECTED_STATUSES = (400, 413, 422)  # Collector says the item itself is bad; don't retry it
+
+
+def station_name():
+    """
+    Name this laptop reports to the collector.
+    Set RADIOSTAT_STATION to override the hostname (e.g. "bench-07").
+    """
+    return os.environ.get("RADIOSTAT_STATION") or socket.gethostname()
+
+
+def _safe_name(name):
+    # Station names and filenames come off the network, keep them to one path component
+    name = re.sub(r"[^A-Za-z0-9._-]", "_", os.path.basename(str(name)))
+    return name.lstrip(".") or "unnamed"
+
+
+# ---------------------------------------------------------------------------
+# Teacher side: collector server
+# ---------------------------------------------------------------------------
+
+class RunStore:
+    """
+    Files uploaded by the stations plus an SQLite index of them.
+    Layout: <store_dir>/<station>/runs/<file> and <store_dir>/<station>/responses/<file>
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(store_dir, "index.db"), check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            " id TEXT PRIMARY KEY,"
+            " station TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " filename TEXT NOT NULL,"
+            " path TEXT NOT NULL,"
+            " created TEXT,"
+            " received TEXT NOT NULL,"
+            " metadata TEXT)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS items_station ON items (station, kind, created)")
+        self.db.commit()
+
+    def add(self, station, item):
+        """Store one uploaded item. Returns False if it was already stored (a retried upload)."""
+        station = _safe_name(station)
+        kind = item["kind"]
+        if kind not in ("run", "responses"):
+            raise ValueError(f"Unknown item kind: {kind}")
+
+        folder = os.path.join(self.store_dir, station, "runs" if kind == "run" else "responses")
+        filename = _safe_name(item["filename"])
+        # Same-second run timestamps and station names that sanitize alike would otherwise
+        # land on the same path, so every stored file carries its item id
+        stem, ext = os.path.splitext(filename)
+        path = os.path.join(folder, f"{stem}_{_safe_name(item['id'])}{ext}")
+
+        with self.lock:
+            row = self.db.execute("SELECT 1 FROM items WHERE id = ?", (item["id"],)).fetchone()
+            if row:
+                return False
+
+            os.makedirs(folder, exist_ok=True)
+            with open(path, "w", newline="") as f:
+                f.write(item["content"])
+            if kind == "run":
+                # Same sidecar layout as beaker_test.metadata_path, so the scan-rate fit can
+                # read stored runs directly; the station stands in for a missing cell name
+                metadata = dict(item.get("metadata") or {})
+                metadata.setdefault("station", station)
+                with open(os.path.splitext(path)[0] + ".json", "w") as f:
+                    json.dump(metadata, f, indent=2)
+
+            self.db.execute(
+                "INSERT INTO items (id, station, kind, filename, path, created, received, metadata)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (item["id"], station, kind, filename, os.path.relpath(path, self.store_dir),
+                 item.get("created"), datetime.now().isoformat(timespec="seconds"),
+                 json.dumps(item.get("metadata") or {})),
+            )
+            self.db.commit()
+        return True
+
+    def list_items(self, station=None, kind=None):
+        query = "SELECT id, station, kind, filename, path, created, received, metadata FROM items"
+        clauses, args = [], []
+        if station:
+            clauses.append("station = ?")
+            args.append(_safe_name(station))
+        if kind:
+            clauses.append("kind = ?")
+            args.append(kind)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY station, created"
+
+        with self.lock:
+            rows = self.db.execute(query, args).fetchall()
+
+        keys = ("id", "station", "kind", "filename", "path", "created", "received", "metadata")
+        items = [dict(zip(keys, row)) for row in rows]
+        for item in items:
+            item["metadata"] = json.loads(item["metadata"] or "{}")
+        return items
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    # POST /upload  gzip-compressed JSON batch: {"station": ..., "items": [...]}
+    # GET  /runs    JSON index, optional ?station=...&kind=run|responses
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/upload":
+            self.send_error(404)
+            return
+        # 400 means the payload itself is bad and the station sets it aside; anything that
+        # goes wrong on this machine (full disk, locked index) is a 500 so stations retry
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            batch = json.loads(body)
+            station = batch["station"]
+            items = list(batch["items"])
+        except (KeyError, ValueError, TypeError, EOFError, zlib.error, gzip.BadGzipFile) as e:
+            self.send_error(400, f"Bad upload: {e}")
+            return
+
+        try:
+            stored = sum(self.server.store.add(station, item) for item in items)
+        except (KeyError, ValueError, TypeError) as e:
+            self.send_error(400, f"Bad upload: {e}")
+            return
+        except (OSError, sqlite3.Error) as e:
+            self.send_error(500, f"Could not store upload: {e}")
+            return
+        self._send_json({"received": len(items), "stored": stored})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/runs":
+            self.send_error(404)
+            return
+        query = parse_qs(url.query)
+        items = self.server.store.list_items(
+            station=query.get("station", [None])[0],
+            kind=query.get("kind", [None])[0],
+        )
+        self._send_json(items)
+
+    def _send_json(self, obj):
+        data = json.dumps(obj).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        print(f"[collector] {self.address_string()} {format % args}")
+
+
+def make_collector(host="0.0.0.0", port=DEFAULT_PORT, store_dir="collected"):
+    server = ThreadingHTTPServer((host, port), CollectorHandler)
+    server.store = RunStore(store_dir)
+    return server
+
+
+def run_collector(host="0.0.0.0", port=DEFAULT_PORT, store_dir="collected"):
+    server = make_collector(host, port, store_dir)
+    print(f"Collecting runs on http://{host}:{server.server_address[1]} into {os.path.abspath(store_dir)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# ---------------------------------------------------------------------------
+# Station side: upload client
+# ---------------------------------------------------------------------------
+
+class RunUploader:
+    """
+    Queues finished runs and response snapshots and uploads them in the background.
+    Every queued item is first written to the outbox directory, so nothing is lost
+    if the collector is unreachable or the app is closed before the upload happens.
+    """
+
+    def __init__(self, server_url, station=None, outbox_dir="output/outbox", batch_size=BATCH_SIZE):
+        self.upload_url = server_url.rstrip("/") + "/upload"
+        self.station = station or station_name()
+        self.outbox_dir = outbox_dir
+        self.batch_size = batch_size
+        self.last_error = None
+        self._last_responses = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        os.makedirs(outbox_dir, exist_ok=True)
+
+        # Anything left over from a previous session is picked up on the first pass
+        self._thread = threading.Thread(target=self._worker, name="RunUploader", daemon=True)
+        self._thread.start()
+
+    def queue_run(self, data_path, metadata=None):
+        with open(data_path, "r") as f:
+            content = f.read()
+        self._queue("run", os.path.basename(data_path), content, metadata)
+
+    def queue_responses(self, responses):
+        content = json.dumps(responses, indent=2)
+        if content == self._last_responses:
+            return  # Pages save on every Next click; skip snapshots that didn't change
+        self._last_responses = content
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self._queue("responses", f"student_responses_{stamp}.json", content)
+
+    def pending(self):
+        return sorted(name for name in os.listdir(self.outbox_dir) if name.endswith(".json"))
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def _queue(self, kind, filename, content, metadata=None):
+        item = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "filename": filename,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "content": content,
+            "metadata": metadata or {},
+        }
+        # Timestamp prefix keeps the outbox in queue order; write then rename so the
+        # worker never sees a half-written item
+        name = f"{time.time_ns()}_{item['id']}.json"
+        tmp_path = os.path.join(self.outbox_dir, name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(item, f)
+        os.replace(tmp_path, os.path.join(self.outbox_dir, name))
+        self._wakeup.set()
+
+    def _worker(self):
+        backoff = MIN_BACKOFF
+        while not self._stop.is_set():
+            names = self.pending()[:self.batch_size]
+            if not names:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            try:
+                self._upload_or_set_aside(names)
+            except Exception as e:
+                self.last_error = e
+                # Exponential backoff with jitter so a room of laptops doesn't retry in lockstep
+                self._stop.wait(backoff * random.uniform(0.5, 1.5))
+                backoff = min(backoff * 2, MAX_BACKOFF)
+                continue
+
+            self.last_error = None
+            backoff = MIN_BACKOFF
+
+    def _upload_or_set_aside(self, names):
+        """
+        Uploads a batch and removes it from the outbox. If the collector rejects the batch
+        as malformed, items are sent one by one and only the rejected ones are set aside as
+        .bad, so one bad item can't hold up everything queued behind it. Every other error
+        (network, 5xx, or a 404/403 from a misconfigured RADIOSTAT_COLLECTOR) propagates so
+        the worker backs off and retries with the items still queued.
+        """
+
+        try:
+            self._upload(names)
+        except urllib.error.HTTPError as e:
+            if e.code not in REJECTED_STATUSES:
+                raise
+            if len(names) > 1:
+                for name in names:
+                    self._upload_or_set_aside([name])
+                return
+            path = os.path.join(self.outbox_dir, names[0])
+            if os.path.exists(path):
+                os.replace(path, path + ".bad")
+            return
+
+        self._remove(names)
+
+    def _remove(self, names):
+        for name in names:
+            path = os.path.join(self.outbox_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _upload(self, names):
+        items = []
+        for name in names:
+            path = os.path.join(self.outbox_dir, name)
+            try:
+                with open(path, "r") as f:
+                    items.append(json.load(f))
+            except ValueError:
+                # Unreadable item would block the queue forever; set it aside for a human
+                os.replace(path, path + ".bad")
+
+        body = gzip.compress(json.dumps({"station": self.station, "items": items}).encode("utf-8"))
+        request = urllib.request.Request(
+            self.upload_url,
+            data=body,
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            json.loads(response.read())
@@ -0,0 +1,202 @@
+import os
+import numpy as np
+import pandas as pd
+
+GRID_POINTS = 400
+TURN_FRACTION = 0.05    # Voltage must retreat this fraction of the window to count as a turn
+
+# The beaker test starts at volt_max, so the falling (plating) sweep comes first
+DIRECTIONS = ("cathodic", "anodic")
+DIRECTION_LABELS = {"cathodic": "Cathodic (Plating)", "anodic": "Anodic (Stripping)"}
+
+
+def rising_mask(volt, turn_fraction=TURN_FRACTION):
+    """
+    True for samples on a rising sweep. Direction only changes once the voltage has moved
+    back from its running extreme by turn_fraction of the window, so measurement noise
+    between closely spaced samples at slow scan rates can't flip it. Each turning point
+    belongs to the sweep that ends there; works for any number of cycles.
+    """
+
+    volt = np.asarray(volt, dtype=float)
+    rising = np.zeros(len(volt), dtype=bool)
+    if len(volt) < 2:
+        return rising
+    threshold = turn_fraction * (volt.max() - volt.min())
+
+    direction = None        # Unknown until the voltage first moves past the threshold
+    extreme_index = 0
+    segment_start = 0
+    for i, v in enumerate(volt):
+        if direction is None:
+            if abs(v - volt[0]) > threshold:
+                direction = v > volt[0]
+                extreme_index = i
+            continue
+        if (v > volt[extreme_index]) if direction else (v < volt[extreme_index]):
+            extreme_index = i
+        elif abs(v - volt[extreme_index]) > threshold:
+            rising[segment_start:extreme_index + 1] = direction
+            segment_start = extreme_index + 1
+            direction = not direction
+            extreme_index = i
+
+    rising[segment_start:] = bool(direction)
+    return rising
+
+
+def load_sweeps(filepath):
+    """
+    Reads a tab-delimited CV data file and splits it by sweep direction.
+    Returns: {'cathodic': (volt, curr), 'anodic': (volt, curr)} with volt sorted ascending and curr in mA
+    """
+
+    data = pd.read_csv(filepath, sep='\t')
+    volt = data['Voltage (V)'].to_numpy(dtype=float)
+    curr = data['Current (uA)'].to_numpy(dtype=float) / 1000  # convert µA to mA
+
+    rising = rising_mask(volt)
+    sweeps = {}
+    for direction, mask in zip(DIRECTIONS, (~rising, rising)):
+        v, c = volt[mask], curr[mask]
+        order = np.argsort(v, kind='stable')  # np.interp needs increasing x
+        sweeps[direction] = (v[order], c[order])
+    return sweeps
+
+
+def common_grid(sweeps, num=GRID_POINTS):
+    """Voltage grid spanning every sweep in the list of (volt, curr) pairs."""
+    lo = min(v[0] for v, c in sweeps if len(v))
+    hi = max(v[-1] for v, c in sweeps if len(v))
+    return np.linspace(lo, hi, num)
+
+
+def resample_sweeps(sweeps, grid):
+    """
+    Resamples many (volt, curr) sweeps onto one voltage grid with a single np.interp call.
+
+    The sweeps are padded into one (runs, samples) array and each row is shifted along the
+    voltage axis by its own offset, so the flattened array is still increasing and one 1-D
+    interpolation covers every run. Grid points outside a run's voltage range come back as NaN.
+    Returns: array of shape (len(sweeps), len(grid))
+    """
+
+    grid = np.asarray(grid, dtype=float)
+    sweeps = [(v, c) for v, c in sweeps]
+    n_runs = len(sweeps)
+    if n_runs == 0:
+        return np.empty((0, len(grid)))
+
+    lengths = np.array([len(v) for v, c in sweeps])
+    width = max(lengths.max(), 1)
+
+    span_lo = min([grid.min()] + [v[0] for v, c in sweeps if len(v)])
+    span_hi = max([grid.max()] + [v[-1] for v, c in sweeps if len(v)])
+    span = (span_hi - span_lo) + 1.0
+
+    # Pad with each row's last sample; repeated x values are fine for np.interp
+    volt = np.full((n_runs, width), span_lo)
+    curr = np.full((n_runs, width), np.nan)
+    for i, (v, c) in enumerate(sweeps):
+        if len(v):
+            volt[i, :len(v)] = v
+            volt[i, len(v):] = v[-1]
+            curr[i, :len(c)] = c
+            curr[i, len(c):] = c[-1]
+
+    lo = np.where(lengths > 0, volt[:, 0], np.inf)
+    hi = np.where(lengths > 0, volt[np.arange(n_runs), np.maximum(lengths - 1, 0)], -np.inf)
+
+    offsets = np.arange(n_runs)[:, None] * span
+
+    resampled = np.interp(
+        (grid[None, :] + offsets).ravel(),
+        (volt + offsets).ravel(),
+        curr.ravel(),
+    ).reshape(n_runs, len(grid))
+
+    outside = (grid[None, :] < lo[:, None]) | (grid[None, :] > hi[:, None])
+    resampled[outside] = np.nan
+    return resampled
+
+
+def pairwise_differences(curves):
+    """
+    Differences between every pair of resampled curves (row i minus row j for i < j).
+    Returns: (pairs, diffs) where pairs is a (n_pairs, 2) index array
+    """
+
+    i, j = np.triu_indices(len(curves), k=1)
+    return np.column_stack((i, j)), curves[i] - curves[j]
+
+
+class RunComparison:
+    """
+    Keeps the runs being compared plus a per-run cache of their resampled sweeps, so
+    adding a run or switching sweep direction only interpolates what isn't cached yet.
+    """
+
+    def __init__(self, grid_points=GRID_POINTS):
+        self.grid_points = grid_points
+        self.paths = []
+        self.missing = []      # Runs dropped because their file was moved or deleted
+        self._sweeps = {}      # (path, mtime) -> {'cathodic': (v, c), 'anodic': (v, c)}
+        self._resampled = {}   # (path, mtime, direction, grid key) -> resampled row
+
+    def add_runs(self, paths):
+        for path in paths:
+            if path not in self.paths:
+                self.paths.append(path)
+
+    def clear(self):
+        self.paths = []
+        self.missing = []
+        self._sweeps = {}
+        self._resampled = {}
+
+    def labels(self):
+        return [os.path.splitext(os.path.basename(p))[0] for p in self.paths]
+
+    def _key(self, path):
+        return (path, os.path.getmtime(path))
+
+    def sweeps(self, direction):
+        keys = []
+        for path in list(self.paths):
+            try:
+                keys.append(self._key(path))
+            except OSError:
+                self.paths.remove(path)
+                self.missing.append(path)
+        # Drop runs that were removed or rewritten since they were loaded
+        self._sweeps = {key: self._sweeps[key] for key in keys if key in self._sweeps}
+        for key in keys:
+            if key not in self._sweeps:
+                self._sweeps[key] = load_sweeps(key[0])
+        return [self._sweeps[key][direction] for key in keys]
+
+    def resampled(self, direction):
+        """Returns: (grid, curves) with one row per run on the shared grid for this direction"""
+        sweeps = self.sweeps(direction)
+        if not sweeps:
+            return np.empty(0), np.empty((0, 0))
+
+        grid = common_grid(sweeps, self.grid_points)
+        grid_key = (grid[0], grid[-1], len(grid))
+        keys = [self._key(p) + (direction, grid_key) for p in self.paths]
+
+        # Keep only this direction's current grid (and the other direction's rows for
+        # current runs); rows on a grid that a newly added run widened are never reused
+        run_keys = set(self._sweeps)
+        self._resampled = {
+            key: row for key, row in self._resampled.items()
+            if key[:2] in run_keys and (key[2] != direction or key[3] == grid_key)
+        }
+
+        missing = [n for n, key in enumerate(keys) if key not in self._resampled]
+        if missing:
+            rows = resample_sweeps([sweeps[n] for n in missing], grid)
+            for n, row in zip(missing, rows):
+                self._resampled[keys[n]] = row
+
+        return grid, np.vstack([self._resampled[key] for key in keys])
@@ -21,17 +21,13 @@ def run_dummy_test():
     pot.set_curr_range('100uA')  # Adjust if necessary
 
     print("Running dummy test...")
-    data = pot.run_test(test_name, display='pbar')
-
-    # Extract columns from data
-    time_vals = [row[0] for row in data]
-    curr_vals = [row[1] for row in data]
-    volt_vals = [row[2] for row in data]
+    # run_test returns a (t, volt, curr) tuple of lists
+    time_vals, volt_vals, curr_vals = pot.run_test(test_name, display='pbar')
 
     # Plot current vs voltage
     plt.plot(volt_vals, curr_vals)
     plt.xlabel('Voltage (V)')
-    plt.ylabel('Current (A)')
+    plt.ylabel('Current (uA)')
     plt.title('Dummy Cell Linear Sweep')
     plt.grid(True)
     plt.tight_layout()
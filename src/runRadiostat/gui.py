@@ -2,8 +2,20 @@ import tkinter as tk
 from tkinter import messagebox
 from runRadiostat.dummy_test import run_dummy_test
 from runRadiostat.beaker_test import run_beaker_test
+from runRadiostat.health_check import check_all_devices, format_report
 
 def launch_gui():
+    def on_check_click():
+        try:
+            results = check_all_devices()
+            report = format_report(results)
+            if results and all(r["ok"] for r in results):
+                messagebox.showinfo("Health Check", report)
+            else:
+                messagebox.showwarning("Health Check", report)
+        except Exception as e:
+            messagebox.showerror("Error", f"Something went wrong:\n{e}")
+
     def on_run_click():
         try:
             run_dummy_test()
@@ -18,12 +30,15 @@ def launch_gui():
 
     window = tk.Tk()
     window.title("Radiostat: Dummy Cell Check")
-    window.geometry("300x150")
+    window.geometry("300x200")
 
     label = tk.Label(window, text="Check Rodeostat connection")
     label.pack(pady=10)
 
-    run_button = tk.Button(window, text="Run Dummy Test", command=on_run_click)
+    check_button = tk.Button(window, text="Run Health Check", command=on_check_click)
+    check_button.pack(pady=10)
+
+    run_button = tk.Button(window, text="Run Dummy Sweep", command=on_run_click)
     run_button.pack(pady=10)
 
     beaker_button = tk.Button(window, text="Run Beaker Test", command=on_beaker_click)
@@ -3,9 +3,15 @@ import tkinter.font as tkFont
 import matplotlib.pyplot as plt
 import json
 import os
+import numpy as np
 from runRadiostat.analyze_cv import analyze_cv_file
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from runRadiostat.beaker_test import run_beaker_test
+from runRadiostat.beaker_test import run_beaker_test, load_run_metadata
+from runRadiostat.kinetics import load_scan_rate_table, fit_scan_rate_series, plot_scan_rate_fits
+from runRadiostat.collector import RunUploader
+from runRadiostat.compare_cv import RunComparison, DIRECTIONS, DIRECTION_LABELS, pairwise_differences
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 
 class Page(tk.Frame):
     def __init__(self, parent, controller):
@@ -28,6 +34,11 @@ class GuidedFlowApp(tk.Tk):
         self.pages = {}
         self.responses = {}
 
+        # Push runs and responses to the teacher machine when a collector is configured,
+        # e.g. RADIOSTAT_COLLECTOR=http://192.168.1.20:8765
+        collector_url = os.environ.get("RADIOSTAT_COLLECTOR")
+        self.uploader = RunUploader(collector_url) if collector_url else None
+
         # Order: IntroPage, DemoTestPage, RunTestPage, ExplainPage, AnalyzePage, CERPage, ConclusionPage
         for PageClass in (IntroPage, DemoTestPage, RunTestPage, ExplainPage, AnalyzePage, CERPage, ConclusionPage):
             page = PageClass(parent=container, controller=self)
@@ -44,6 +55,12 @@ class GuidedFlowApp(tk.Tk):
         os.makedirs("output", exist_ok=True)
         with open("output/student_responses.json", "w") as f:
             json.dump(self.responses, f, indent=2)
+        if self.uploader:
+            self.uploader.queue_responses(self.responses)
+
+    def upload_run(self, data_path):
+        if self.uploader and data_path:
+            self.uploader.queue_run(data_path, load_run_metadata(data_path))
 
 class IntroPage(Page):
     def __init__(self, parent, controller):
@@ -129,7 +146,8 @@ class DemoTestPage(Page):
         import pandas as pd
 
         try:
-            run_beaker_test()
+            data_path = run_beaker_test()
+            self.controller.upload_run(data_path)
             self.status_label.config(text="Demo test completed successfully!", fg="green")
 
             files = sorted(glob.glob("output/cv_data_*.txt"), key=os.path.getmtime)
@@ -230,13 +248,33 @@ class RunTestPage(Page):
 
         tk.Label(setup_frame, text=setup_steps, justify="left", anchor="w", wraplength=550).pack()
 
+        cell_row = tk.Frame(scrollable_frame)
+        cell_row.pack(fill="x", expand=True, pady=5)
+        tk.Label(cell_row, text="Cell / bench name:").pack(side="left")
+        self.cell_entry = tk.Entry(cell_row)
+        self.cell_entry.pack(side="left", fill="x", expand=True, padx=5)
+
         self.test_canvases = [None, None, None]
         self.annotation_boxes = []
+        self.electrolyte_entries = []
+        self.scan_rate_entries = []
 
         for i in range(3):
             test_label = tk.Label(scrollable_frame, text=f"Test {i+1}", font=("Helvetica", 14, "bold"))
             test_label.pack(fill="x", expand=True, pady=(15, 5))
 
+            settings_row = tk.Frame(scrollable_frame)
+            settings_row.pack(fill="x", expand=True, pady=2)
+            tk.Label(settings_row, text="Electrolyte:").pack(side="left")
+            electrolyte_entry = tk.Entry(settings_row, width=15)
+            electrolyte_entry.pack(side="left", padx=5)
+            self.electrolyte_entries.append(electrolyte_entry)
+            tk.Label(settings_row, text="Scan rate (V/s):").pack(side="left")
+            scan_rate_entry = tk.Entry(settings_row, width=6)
+            scan_rate_entry.insert(0, "1.00")
+            scan_rate_entry.pack(side="left", padx=5)
+            self.scan_rate_entries.append(scan_rate_entry)
+
             run_btn = tk.Button(scrollable_frame, text=f"Run Beaker Test {i+1}", command=lambda i=i: self.run_test(i))
             run_btn.pack(fill="x", expand=True, pady=5)
 
@@ -250,6 +288,10 @@ class RunTestPage(Page):
             annotation_box.pack(fill="x", expand=True, pady=5)
             self.annotation_boxes.append(annotation_box)
 
+        self.session_runs = []
+        self.comparison_panel = ComparisonPanel(scrollable_frame, lambda: self.session_runs)
+        self.comparison_panel.pack(fill="x", expand=True, pady=10)
+
         back_btn = tk.Button(scrollable_frame, text="← Back", command=lambda: controller.show_page("TestPage"))
         back_btn.pack(fill="x", expand=True, pady=5)
 
@@ -261,7 +303,14 @@ class RunTestPage(Page):
 
     def run_test(self, test_index):
         try:
-            run_beaker_test()
+            volt_per_sec = float(self.scan_rate_entries[test_index].get())
+            data_path = run_beaker_test(
+                volt_per_sec=volt_per_sec,
+                cell=self.cell_entry.get().strip() or None,
+                electrolyte=self.electrolyte_entries[test_index].get().strip() or None,
+            )
+            self.controller.upload_run(data_path)
+            self.session_runs.append(data_path)
             status_label = getattr(self, f"status_label_{test_index}")
             status_label.config(text=f"Test {test_index + 1} completed successfully!", fg="green")
         except Exception as e:
@@ -323,6 +372,139 @@ class RunTestPage(Page):
             self.controller.responses[f"test{i+1}_graph_annotation"] = annotation
         self.controller.save_responses()
 
+class ComparisonPanel(tk.LabelFrame):
+    MAX_PAIRWISE_RUNS = 12  # Above this, differences are taken from the mean of all runs instead
+    MAX_LEGEND_RUNS = 10
+
+    def __init__(self, parent, get_session_runs):
+        super().__init__(parent, text="📊 Compare Runs", padx=10, pady=5)
+        self.get_session_runs = get_session_runs
+        self.comparison = RunComparison()
+        self.direction = tk.StringVar(value=DIRECTIONS[0])
+        self.canvas = None
+
+        tk.Label(
+            self,
+            text="Overlay runs on the same voltage axis to compare electrolytes. "
+                 "Add your runs from this session or load saved data files (a whole class works too).",
+            justify="left",
+            wraplength=550
+        ).pack(fill="x", pady=5)
+
+        button_row = tk.Frame(self)
+        button_row.pack(fill="x", pady=5)
+        tk.Button(button_row, text="Add This Session's Runs", command=self.add_session_runs).pack(side="left", padx=2)
+        tk.Button(button_row, text="📂 Add Run Files", command=self.add_run_files).pack(side="left", padx=2)
+        tk.Button(button_row, text="Clear", command=self.clear).pack(side="left", padx=2)
+
+        direction_row = tk.Frame(self)
+        direction_row.pack(fill="x")
+        for direction in DIRECTIONS:
+            tk.Radiobutton(
+                direction_row,
+                text=f"{DIRECTION_LABELS[direction]} sweep",
+                variable=self.direction,
+                value=direction,
+                command=self.refresh
+            ).pack(side="left", padx=2)
+
+        self.status_label = tk.Label(self, text="", font=("Helvetica", 12), fg="green")
+        self.status_label.pack(fill="x")
+
+    def add_session_runs(self):
+        self.comparison.add_runs(self.get_session_runs())
+        self.refresh()
+
+    def add_run_files(self):
+        paths = fd.askopenfilenames(filetypes=[("Text files", "*.txt")])
+        if paths:
+            self.comparison.add_runs(paths)
+            self.refresh()
+
+    def clear(self):
+        self.comparison.clear()
+        self.refresh()
+
+    def build_figure(self):
+        # Built once; each refresh swaps the segments of two LineCollections instead of
+        # creating one Line2D per run, which keeps hundreds of traces responsive
+        fig, (self.overlay_ax, self.diff_ax) = plt.subplots(2, 1, figsize=(8.5, 5.5))
+        self.overlay_lines = LineCollection([], linewidths=1)
+        self.diff_lines = LineCollection([], linewidths=1)
+        self.overlay_ax.add_collection(self.overlay_lines)
+        self.diff_ax.add_collection(self.diff_lines)
+        self.overlay_ax.set_ylabel("Current (mA)")
+        self.diff_ax.set_xlabel("Voltage (V)")
+        self.diff_ax.set_ylabel("Δ Current (mA)")
+        for ax in (self.overlay_ax, self.diff_ax):
+            ax.grid(True)
+        fig.tight_layout()
+        self.canvas = FigureCanvasTkAgg(fig, master=self)
+        self.canvas.get_tk_widget().pack(pady=5)
+
+    def refresh(self):
+        try:
+            grid, curves = self.comparison.resampled(self.direction.get())
+        except Exception as e:
+            self.status_label.config(text=f"Could not load runs: {e}", fg="red")
+            return
+
+        if self.canvas is None:
+            self.build_figure()
+
+        n_runs = len(curves)
+        direction = DIRECTION_LABELS[self.direction.get()]
+        if n_runs <= self.MAX_PAIRWISE_RUNS:
+            pairs, diffs = pairwise_differences(curves)
+            diff_title = f"Pairwise Differences – {direction} Sweep"
+        else:
+            diffs = curves - np.nanmean(curves, axis=0)
+            diff_title = f"Difference From Mean of {n_runs} Runs – {direction} Sweep"
+
+        colors = plt.cm.viridis(np.linspace(0, 1, max(n_runs, 1)))[:n_runs]
+        self.overlay_lines.set_segments(self._segments(grid, curves))
+        self.overlay_lines.set_color(colors)
+        self.diff_lines.set_segments(self._segments(grid, diffs))
+        self.diff_lines.set_color("gray" if n_runs <= self.MAX_PAIRWISE_RUNS else colors)
+
+        self.overlay_ax.set_title(f"Current vs Voltage – {n_runs} Runs, {direction} Sweep")
+        self.diff_ax.set_title(diff_title)
+
+        legend = self.overlay_ax.get_legend()
+        if legend:
+            legend.remove()
+        if 0 < n_runs <= self.MAX_LEGEND_RUNS:
+            handles = [Line2D([], [], color=c) for c in colors]
+            self.overlay_ax.legend(handles, self.comparison.labels(), fontsize=7)
+
+        if n_runs:
+            self._autoscale(self.overlay_ax, grid, curves)
+            self._autoscale(self.diff_ax, grid, diffs)
+
+        self.canvas.draw_idle()
+        status, color = f"Comparing {n_runs} run(s).", "green"
+        if self.comparison.missing:
+            names = ", ".join(os.path.basename(p) for p in self.comparison.missing)
+            status, color = f"{status} Removed runs whose files are gone: {names}", "orange"
+            self.comparison.missing = []
+        self.status_label.config(text=status, fg=color)
+
+    @staticmethod
+    def _segments(grid, curves):
+        if len(curves) == 0:
+            return []
+        return np.stack(np.broadcast_arrays(grid[None, :], curves), axis=-1)
+
+    @staticmethod
+    def _autoscale(ax, grid, values):
+        # Collections don't take part in relim, so set the limits from the arrays directly
+        if not np.isfinite(values).any():
+            return
+        lo, hi = np.nanmin(values), np.nanmax(values)
+        pad = 0.05 * (hi - lo) or 0.01
+        ax.set_xlim(grid[0], grid[-1])
+        ax.set_ylim(lo - pad, hi + pad)
+
 class ExplainPage(Page):
     def __init__(self, parent, controller):
         super().__init__(parent, controller)
@@ -460,6 +642,18 @@ class AnalyzePage(Page):
 
             self.canvases.append(None)
 
+        # Scan-rate series: peak current vs sqrt(scan rate) and peak shift vs log(scan rate)
+        tk.Label(scrollable_frame, text="Scan-Rate Series (Optional)", font=("Helvetica", 14, "bold")).pack(pady=(15, 5))
+        tk.Label(
+            scrollable_frame,
+            text="Select runs of the same cell taken at different scan rates. Runs are grouped by cell and electrolyte.",
+            wraplength=560
+        ).pack(pady=5)
+        tk.Button(scrollable_frame, text="📂 Select Runs for Scan-Rate Fits", command=self.load_and_fit_scan_rates).pack(pady=5)
+        self.fit_label = tk.Label(scrollable_frame, text="", font=("Helvetica", 12), wraplength=560, justify="left")
+        self.fit_label.pack(pady=10)
+        self.fit_canvas = None
+
         back_btn = tk.Button(scrollable_frame, text="← Back", command=lambda: controller.show_page("ExplainPage"))
         back_btn.pack(pady=5)
 
@@ -507,6 +701,49 @@ class AnalyzePage(Page):
         except Exception as e:
             self.result_labels[index].config(text=f"Error processing file: {e}")
 
+    def load_and_fit_scan_rates(self):
+        filepaths = fd.askopenfilenames(filetypes=[("Text files", "*.txt")])
+        if not filepaths:
+            return
+
+        try:
+            skipped = []
+            table = load_scan_rate_table(filepaths, skipped)
+            skipped_note = ""
+            if skipped:
+                names = ", ".join(f"{os.path.basename(path)} ({reason})" for path, reason in skipped[:5])
+                more = f" and {len(skipped) - 5} more" if len(skipped) > 5 else ""
+                skipped_note = f"Skipped {len(skipped)} run(s): {names}{more}"
+            if table.empty:
+                self.fit_label.config(text="None of these runs have a recorded scan rate and electrolyte. "
+                                           "Use runs taken with this version of the app.\n" + skipped_note)
+                return
+            fits = fit_scan_rate_series(table)
+
+            max_rows = 10
+            lines = []
+            for _, row in fits.head(max_rows).iterrows():
+                lines.append(
+                    f"{row['cell']} / {row['electrolyte']} ({row['n_runs']} runs): "
+                    f"stripping ip slope {row['ip_ox_vs_sqrt_rate_slope']:.3f} mA/√(V/s) (R² {row['ip_ox_vs_sqrt_rate_r2']:.3f}), "
+                    f"plating ip slope {row['ip_red_vs_sqrt_rate_slope']:.3f} mA/√(V/s) (R² {row['ip_red_vs_sqrt_rate_r2']:.3f})"
+                )
+            if len(fits) > max_rows:
+                lines.append(f"... and {len(fits) - max_rows} more groups")
+            if skipped_note:
+                lines.append(skipped_note)
+            self.fit_label.config(text="\n".join(lines))
+
+            if self.fit_canvas is not None:
+                self.fit_canvas.get_tk_widget().destroy()
+            fig = plot_scan_rate_fits(table, fits)
+            self.fit_canvas = FigureCanvasTkAgg(fig, master=self.scrollable_frame)
+            self.fit_canvas.draw()
+            self.fit_canvas.get_tk_widget().pack(pady=10, after=self.fit_label)
+
+        except Exception as e:
+            self.fit_label.config(text=f"Error fitting runs: {e}")
+
     def save_response(self):
         for i, entry in enumerate(self.ce_entries):
             ce_value = entry.get().strip()
@@ -0,0 +1,124 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from serial.tools import list_ports
+from potentiostat import Potentiostat, CurrKey
+from runRadiostat.beaker_test import range_to_uA
+
+TEENSY_USB_VID = 0x16C0     # Rodeostats are built on a Teensy
+SERIAL_TIMEOUT = 0.5        # Seconds to wait for each firmware response
+CHECK_VOLTAGE = 0.0         # Constant voltage applied during the check (V)
+CHECK_DURATION_MS = 100     # Length of the constant-voltage reading (ms)
+
+
+class _CheckedPotentiostat(Potentiostat):
+    # Potentiostat opens the serial port and then queries the firmware inside __init__.
+    # If a query fails, the caller never gets the object back to close, and the port
+    # stays busy for the next check, so close it here before re-raising.
+
+    def __init__(self, port, timeout=SERIAL_TIMEOUT):
+        try:
+            super().__init__(port, timeout=timeout)
+        except Exception:
+            try:
+                if self.is_open:
+                    self.close()
+            except Exception:
+                pass
+            raise
+
+
+def find_ports():
+    """Serial ports that look like an attached Rodeostat."""
+    ports = []
+    for info in list_ports.comports():
+        if info.vid == TEENSY_USB_VID or "usbmodem" in info.device or "ttyACM" in info.device:
+            ports.append(info.device)
+    return sorted(ports)
+
+
+def check_device(port, simulate=False):
+    """
+    Verifies one device: opens the serial link, reads the firmware and hardware variant,
+    then takes a short constant-voltage reading on the largest current range.
+    Returns a dict with port, ok, firmware, variant, current_uA, channels, seconds and error.
+    """
+
+    result = {"port": port, "ok": False, "firmware": None, "variant": None,
+              "current_uA": None, "channels": None, "seconds": None, "error": None}
+    start = time.monotonic()
+    dev = None
+    try:
+        if simulate:
+            from runRadiostat.simulated_device import SimulatedPotentiostat
+            dev = SimulatedPotentiostat(port)
+        else:
+            # Opening the port already queries variant, firmware and hardware version
+            dev = _CheckedPotentiostat(port, timeout=SERIAL_TIMEOUT)
+        result["firmware"] = dev.get_firmware_version()
+        result["variant"] = dev.get_hardware_variant()
+
+        dev.set_curr_range(max(dev.get_all_curr_range(), key=range_to_uA))
+        data = dev.run_test('constant', param={
+            'quietValue': 0.0,
+            'quietTime': 0,
+            'value': CHECK_VOLTAGE,
+            'duration': CHECK_DURATION_MS,
+        }, display=None, filename=None)
+
+        # With the multiplexer enabled, run_test returns {channel: {'t', 'v', 'i'}} instead
+        # of a (t, volt, curr) tuple; every enabled channel has to return samples
+        if isinstance(data, dict):
+            result["channels"] = sorted(data)
+            empty = [chan for chan in result["channels"] if not data[chan][CurrKey]]
+            if empty or not data:
+                raise RuntimeError(f"no samples from multiplexer channel(s) {empty or 'any'}")
+            curr = [c for chan in result["channels"] for c in data[chan][CurrKey]]
+        else:
+            t, volt, curr = data
+        if not curr:
+            raise RuntimeError("no samples returned from constant-voltage test")
+
+        result["current_uA"] = sum(curr) / len(curr)
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    finally:
+        if dev is not None:
+            try:
+                dev.close()
+            except Exception:
+                pass
+        result["seconds"] = time.monotonic() - start
+    return result
+
+
+def check_all_devices(ports=None, simulate=None):
+    """Checks every port at the same time. Defaults to all attached Rodeostats."""
+    # Set RADIOSTAT_SIMULATE=1 to check simulated devices instead of hardware
+    if simulate is None:
+        simulate = bool(os.environ.get("RADIOSTAT_SIMULATE"))
+    if ports is None:
+        ports = ["simulated"] if simulate else find_ports()
+    if not ports:
+        return []
+
+    with ThreadPoolExecutor(max_workers=len(ports)) as pool:
+        return list(pool.map(lambda port: check_device(port, simulate), ports))
+
+
+def format_report(results):
+    if not results:
+        return "No Rodeostat found. Check the USB cable and try again."
+
+    lines = []
+    for r in results:
+        if r["ok"]:
+            channels = f", mux channels {', '.join(map(str, r['channels']))}" if r["channels"] else ""
+            lines.append(f"✅ {r['port']}: OK (firmware {r['firmware']}, {r['variant']}{channels}, "
+                         f"{r['current_uA']:.2f} uA at {CHECK_VOLTAGE} V, {r['seconds']:.2f} s)")
+        else:
+            lines.append(f"❌ {r['port']}: {r['error']} ({r['seconds']:.2f} s)")
+    passed = sum(r["ok"] for r in results)
+    lines.append(f"{passed}/{len(results)} device(s) ready")
+    return "\n".join(lines)
@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from runRadiostat.beaker_test import load_run_metadata
+
+GROUP_KEYS = ['cell', 'electrolyte']
+FIT_RTOL = 1e-12            # Centred sums below this fraction of the raw sums count as zero
+
+# (name, x column, y column) for each fit done per group
+FITS = [
+    ('ip_ox_vs_sqrt_rate',  'sqrt_rate',  'ip_ox'),
+    ('ip_red_vs_sqrt_rate', 'sqrt_rate',  'ip_red'),
+    ('Ep_ox_vs_log_rate',   'log10_rate', 'Ep_ox'),
+    ('Ep_red_vs_log_rate',  'log10_rate', 'Ep_red'),
+]
+
+
+def peak_values(filepath):
+    """
+    Reads a tab-delimited CV data file and finds the oxidation and reduction peaks.
+    Returns: (ip_ox, Ep_ox, ip_red, Ep_red) with currents in mA and potentials in V
+    """
+
+    data = pd.read_csv(filepath, sep='\t')
+    volt = data['Voltage (V)'].to_numpy(dtype=float)
+    current = data['Current (uA)'].to_numpy(dtype=float) / 1000  # convert µA to mA
+
+    i_ox = np.argmax(current)
+    i_red = np.argmin(current)
+    return current[i_ox], volt[i_ox], current[i_red], volt[i_red]
+
+
+def load_scan_rate_table(filepaths, skipped=None):
+    """
+    One row per run with its group keys, scan rate and peaks.
+    A run without a cell name is grouped under the station that took it. Runs that can't
+    be grouped or have no recorded scan rate (saved before parameters were recorded) are
+    left out, and (path, reason) is appended to skipped when a list is given.
+    """
+
+    def skip(path, reason):
+        if skipped is not None:
+            skipped.append((path, reason))
+
+    rows = []
+    for path in filepaths:
+        metadata = load_run_metadata(path)
+        if not metadata or not metadata.get('volt_per_sec'):
+            skip(path, 'no recorded scan rate')
+            continue
+        cell = metadata.get('cell') or metadata.get('station')
+        electrolyte = metadata.get('electrolyte')
+        if not cell or not electrolyte:
+            skip(path, 'no cell or station' if not cell else 'no electrolyte')
+            continue
+        ip_ox, Ep_ox, ip_red, Ep_red = peak_values(path)
+        rows.append({
+            'path': path,
+            'cell': cell,
+            'electrolyte': electrolyte,
+            'volt_per_sec': metadata['volt_per_sec'],
+            'ip_ox': ip_ox,
+            'Ep_ox': Ep_ox,
+            'ip_red': ip_red,
+            'Ep_red': Ep_red,
+        })
+
+    table = pd.DataFrame(rows, columns=['path'] + GROUP_KEYS + ['volt_per_sec', 'ip_ox', 'Ep_ox', 'ip_red', 'Ep_red'])
+    table['sqrt_rate'] = np.sqrt(table['volt_per_sec'].astype(float))
+    table['log10_rate'] = np.log10(table['volt_per_sec'].astype(float))
+    return table
+
+
+def batched_linear_fit(group_index, x, y):
+    """
+    Least-squares line y = slope * x + intercept for every group at once.
+
+    group_index holds an integer group id (0..n_groups-1) per sample; x and y are (n,) or
+    (n, k) arrays, so k independent fits per group are solved together. The sums each
+    closed-form fit needs are accumulated for all groups with np.add.reduceat over the
+    group-sorted samples, so there is no Python loop over groups.
+    Returns: (slope, intercept, r2, n) each of shape (n_groups,) or (n_groups, k).
+    Groups with fewer than two distinct x values get NaN.
+    """
+
+    group_index = np.asarray(group_index)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    order = np.argsort(group_index, kind='stable')
+    groups = group_index[order]
+    x, y = x[order], y[order]
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+
+    def group_sum(values):
+        return np.add.reduceat(values, starts, axis=0)
+
+    n = np.diff(np.r_[starts, len(groups)]).astype(float)
+    if x.ndim > 1:
+        n = n[:, None]
+
+    sx, sy = group_sum(x), group_sum(y)
+    sxx, syy, sxy = group_sum(x * x), group_sum(y * y), group_sum(x * y)
+
+    sxx_c = sxx - sx * sx / n   # Centred sums of squares and cross products
+    syy_c = syy - sy * sy / n
+    sxy_c = sxy - sx * sy / n
+
+    # Replicate runs at one scan rate leave only rounding error in sxx_c, which can be
+    # slightly positive, so compare against the size of the sums rather than against 0
+    x_varies = sxx_c > FIT_RTOL * sxx
+    y_varies = syy_c > FIT_RTOL * syy
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(x_varies, sxy_c / sxx_c, np.nan)
+        intercept = (sy - slope * sx) / n
+        r2 = np.where(y_varies, sxy_c * sxy_c / (sxx_c * syy_c), 1.0)
+    r2 = np.where(np.isnan(slope), np.nan, np.clip(r2, 0.0, 1.0))
+
+    return slope, intercept, r2, np.broadcast_to(n, slope.shape)
+
+
+def fit_scan_rate_series(table):
+    """
+    Randles–Sevcik (peak current vs sqrt(scan rate)) and peak shift (peak potential vs
+    log10(scan rate)) fits for every cell/electrolyte group in one batched solve.
+    Returns: one row per group with <fit>_slope, <fit>_intercept and <fit>_r2 columns
+    """
+
+    if table.empty:
+        return pd.DataFrame(columns=GROUP_KEYS + ['n_runs'])
+
+    codes, uniques = pd.MultiIndex.from_frame(table[GROUP_KEYS]).factorize()
+    x = table[[x_col for name, x_col, y_col in FITS]].to_numpy(dtype=float)
+    y = table[[y_col for name, x_col, y_col in FITS]].to_numpy(dtype=float)
+    slope, intercept, r2, n = batched_linear_fit(codes, x, y)
+
+    # reduceat returns groups in sorted code order, which is the order of uniques
+    fits = pd.DataFrame(list(uniques), columns=GROUP_KEYS)
+    fits['n_runs'] = n[:, 0].astype(int)
+    for k, (name, x_col, y_col) in enumerate(FITS):
+        fits[f'{name}_slope'] = slope[:, k]
+        fits[f'{name}_intercept'] = intercept[:, k]
+        fits[f'{name}_r2'] = r2[:, k]
+    return fits
+
+
+def plot_scan_rate_fits(table, fits, max_labels=10):
+    """Summary figure: peak current vs sqrt(scan rate) and peak potential vs log10(scan rate)."""
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(8.5, 3.5))
+    codes, uniques = pd.MultiIndex.from_frame(table[GROUP_KEYS]).factorize()
+    colors = plt.cm.viridis(np.linspace(0, 1, max(len(uniques), 1)))
+
+    panels = [
+        (ax1, 'sqrt_rate', ('ip_ox', 'ip_red'), ('ip_ox_vs_sqrt_rate', 'ip_red_vs_sqrt_rate'),
+         '√(Scan Rate) (√(V/s))', 'Peak Current (mA)', 'Randles–Sevcik'),
+        (ax2, 'log10_rate', ('Ep_ox', 'Ep_red'), ('Ep_ox_vs_log_rate', 'Ep_red_vs_log_rate'),
+         'log₁₀(Scan Rate) (V/s)', 'Peak Potential (V)', 'Peak Shift'),
+    ]
+
+    # One scatter per panel and one LineCollection for all fit lines, however many groups
+    for ax, x_col, y_cols, fit_names, xlabel, ylabel, title in panels:
+        x = table[x_col].to_numpy(dtype=float)
+        lo = table.groupby(codes)[x_col].min().to_numpy()
+        hi = table.groupby(codes)[x_col].max().to_numpy()
+        segments, line_colors = [], []
+        for y_col, fit_name, marker in zip(y_cols, fit_names, ('o', 's')):
+            ax.scatter(x, table[y_col], c=colors[codes], marker=marker, s=18)
+
+            slope = fits[f'{fit_name}_slope'].to_numpy()
+            intercept = fits[f'{fit_name}_intercept'].to_numpy()
+            ends_x = np.column_stack((lo, hi))
+            ends_y = slope[:, None] * ends_x + intercept[:, None]
+            segments.extend(np.stack((ends_x, ends_y), axis=-1))
+            line_colors.extend(colors[:len(uniques)])
+
+        ax.add_collection(LineCollection(segments, colors=line_colors, linewidths=1))
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        ax.set_title(title)
+        ax.grid(True)
+
+    if 0 < len(uniques) <= max_labels:
+        handles = [plt.Line2D([], [], color=c, marker='o', linestyle='') for c in colors]
+        ax1.legend(handles, [' / '.join(map(str, u)) for u in uniques], fontsize=7)
+
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,104 @@
+import numpy as np
+from potentiostat import HwVariantToCurrRangesDict
+from runRadiostat.beaker_test import range_to_uA
+
+class SimulatedPotentiostat:
+    """
+    Stand-in for potentiostat.Potentiostat that generates a plausible zinc plating/stripping
+    CV instead of talking to hardware. Only the calls this package uses are implemented.
+    Currents clip at the selected range like the real amplifier does.
+    """
+
+    firmware_version = '0.0.9'
+    hardware_version = 'HW0.2'
+
+    def __init__(self, port='simulated', hardware_variant='10V_10MilliAmpV0.2', peak_uA=800.0, seed=None):
+        self.port = port
+        self.hardware_variant = hardware_variant
+        self.peak_uA = peak_uA          # Plating peak current at 0.1 V/s
+        self.curr_range = max(self.get_all_curr_range(), key=range_to_uA)
+        self.sample_rate = 100.0
+        self.params = {}
+        self.rng = np.random.default_rng(seed)
+
+    def get_hardware_variant(self):
+        return self.hardware_variant
+
+    def get_firmware_version(self):
+        return self.firmware_version
+
+    def get_device_id(self):
+        return 0
+
+    def get_all_curr_range(self):
+        return HwVariantToCurrRangesDict[self.hardware_variant]
+
+    def set_curr_range(self, curr_range):
+        if curr_range not in self.get_all_curr_range():
+            raise ValueError('unknown current range')
+        self.curr_range = curr_range
+        return curr_range
+
+    def get_curr_range(self):
+        return self.curr_range
+
+    def set_sample_rate(self, sample_rate):
+        self.sample_rate = sample_rate
+        return sample_rate
+
+    def set_param(self, testname, param):
+        self.params[testname] = dict(param)
+        return self.params[testname]
+
+    def get_param(self, testname):
+        return self.params[testname]
+
+    def close(self):
+        pass
+
+    def run_test(self, testname, param=None, filename=None, display='pbar', timeunit='s'):
+        if param is not None:
+            self.set_param(testname, param)
+        param = self.params[testname]
+
+        if testname == 'cyclic':
+            t, volt, scan_rate = self._cyclic_waveform(param)
+        elif testname == 'constant':
+            t = np.arange(0, param['duration'] / 1000.0, 1.0 / self.sample_rate)
+            volt = np.full_like(t, param['value'])
+            scan_rate = np.zeros_like(t)
+        else:
+            raise ValueError(f'simulated device does not support test {testname}')
+
+        curr = self._current(volt, scan_rate)
+        if timeunit == 'ms':
+            t = t * 1000.0
+        return list(t), list(volt), list(curr)
+
+    def _cyclic_waveform(self, param):
+        period = param['period'] / 1000.0
+        duration = period * param['numCycles']
+        t = np.arange(0, duration, 1.0 / self.sample_rate)
+        phase = (t / period + param['shift']) % 1.0
+        volt = param['offset'] + param['amplitude'] * (1.0 - 4.0 * np.abs(phase - 0.5))
+        scan_rate = np.gradient(volt, t) if len(t) > 1 else np.zeros_like(t)
+        return t, volt, scan_rate
+
+    def _current(self, volt, scan_rate):
+        # Double-layer charging plus Gaussian plating (falling sweep) and stripping (rising
+        # sweep) peaks. Peak height follows sqrt(scan rate) and the peaks move apart with
+        # log(scan rate), so scan-rate series behave like a quasi-reversible couple.
+        rate = np.maximum(np.abs(scan_rate), 1e-3)
+        scale = self.peak_uA * np.sqrt(rate / 0.1)
+        shift = 0.03 * np.log10(rate / 0.1)
+
+        plating = -scale * np.exp(-((volt - (-1.05 - shift)) / 0.06) ** 2)
+        stripping = 0.9 * scale * np.exp(-((volt - (-0.85 + shift)) / 0.05) ** 2)
+        faradaic = np.where(scan_rate < 0, plating, np.where(scan_rate > 0, stripping, 0.0))
+
+        charging = 50.0 * scan_rate   # 50 µF double layer -> µA
+        noise = self.rng.normal(0.0, 0.002 * self.peak_uA + 0.01, size=volt.shape)
+
+        limit = range_to_uA(self.curr_range)
+        return np.clip(faradaic + charging + noise, -limit, limit)
+
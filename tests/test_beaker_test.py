@@ -0,0 +1,100 @@
+import matplotlib
+import numpy as np
+from runRadiostat import beaker_test, simulated_device
+from runRadiostat.beaker_test import (choose_curr_range, next_curr_range, is_clipped,
+                                      prescan_peak_current, range_to_uA)
+from runRadiostat.simulated_device import SimulatedPotentiostat
+
+
+def cyclic_param(volt_min, volt_max, volt_per_sec):
+    amplitude = (volt_max - volt_min) / 2.0
+    return {
+        'quietValue': 0.0,
+        'quietTime': 0,
+        'amplitude': amplitude,
+        'offset': (volt_max + volt_min) / 2.0,
+        'period': int(1000 * 4 * amplitude / volt_per_sec),
+        'numCycles': 1,
+        'shift': 0.5,
+    }
+
+
+def test_range_helpers():
+    ranges = ['1uA', '10uA', '100nA', '60nA']
+    assert range_to_uA('100nA') == 0.1
+    assert choose_curr_range(0.05, ranges) == '100nA'
+    assert choose_curr_range(5.0, ranges) == '10uA'
+    assert choose_curr_range(500.0, ranges) == '10uA'
+    assert next_curr_range('100nA', ranges) == '1uA'
+    assert next_curr_range('10uA', ranges) is None
+    assert is_clipped([0.0, -99.0], '100uA')
+    assert not is_clipped([0.0, -50.0], '100uA')
+
+
+def test_small_signal_cell_gets_tight_range():
+    dev = SimulatedPotentiostat(peak_uA=5, seed=0)
+    param = cyclic_param(-1.2, -0.4, 0.5)
+    dev.set_param('cyclic', param)
+
+    expected_peak = prescan_peak_current(dev, 'cyclic', param, 0.5, 100.0)
+    curr_range = choose_curr_range(expected_peak, dev.get_all_curr_range())
+    assert curr_range == '100uA'
+
+    # Pre-scan restored the main run's settings; the main run fits the chosen range
+    dev.set_curr_range(curr_range)
+    t, volt, curr = dev.run_test('cyclic', display=None)
+    assert dev.get_param('cyclic') == param
+    assert not is_clipped(curr, curr_range)
+    assert np.max(np.abs(curr)) < range_to_uA(curr_range) / 2
+
+
+def pick_range(peak_uA, volt_per_sec, seed):
+    dev = SimulatedPotentiostat(peak_uA=peak_uA, seed=seed)
+    param = cyclic_param(-1.2, -0.4, volt_per_sec)
+    dev.set_param('cyclic', param)
+    curr_range = choose_curr_range(prescan_peak_current(dev, 'cyclic', param, volt_per_sec, 100.0),
+                                   dev.get_all_curr_range())
+    dev.set_curr_range(curr_range)
+    t, volt, curr = dev.run_test('cyclic', display=None)
+    return curr_range, curr
+
+
+def test_diffusion_peak_near_range_boundary_does_not_clip():
+    # Main-run peaks of about 1000 µA and 1140 µA sit just above the 1000uA range
+    for peak_uA, volt_per_sec in ((300, 1.0), (500, 0.5)):
+        for seed in range(10):
+            curr_range, curr = pick_range(peak_uA, volt_per_sec, seed)
+            assert curr_range == '10000uA'
+            assert not is_clipped(curr, curr_range)
+
+
+def test_diffusion_peak_below_range_boundary_gets_tight_range():
+    # Main-run peak of about 525 µA fits 1000uA with headroom
+    for seed in range(10):
+        curr_range, curr = pick_range(150, 1.0, seed)
+        assert curr_range == '1000uA'
+        assert not is_clipped(curr, curr_range)
+
+
+def test_clipped_main_run_is_retried_on_next_range(tmp_path, monkeypatch):
+    matplotlib.use('Agg')
+    ranges_run = []
+
+    class RecordingDevice(SimulatedPotentiostat):
+        def run_test(self, testname, **kwargs):
+            ranges_run.append(self.curr_range)
+            return super().run_test(testname, **kwargs)
+
+    monkeypatch.setattr(simulated_device, 'SimulatedPotentiostat', RecordingDevice)
+    # Force the pre-scan estimate one range too low so the main run clips
+    monkeypatch.setattr(beaker_test, 'choose_curr_range', lambda peak_uA, all_ranges: '1000uA')
+
+    data_path = beaker_test.run_beaker_test(simulate=True, output_dir=str(tmp_path))
+
+    # Pre-scan on the largest range, clipped main run, one retry
+    assert ranges_run == ['10000uA', '1000uA', '10000uA']
+    metadata = beaker_test.load_run_metadata(data_path)
+    assert metadata['curr_range'] == '10000uA'
+    with open(data_path) as f:
+        curr = [float(line.split('\t')[2]) for line in f.readlines()[1:]]
+    assert not is_clipped(curr, '10000uA')
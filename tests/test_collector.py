@@ -0,0 +1,103 @@
+import os
+import json
+import time
+import threading
+import pytest
+from runRadiostat.collector import make_collector, RunUploader
+
+
+@pytest.fixture
+def collector(tmp_path):
+    server = make_collector("127.0.0.1", 0, str(tmp_path / "store"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_rejected_item_does_not_block_outbox(collector, tmp_path):
+    outbox = tmp_path / "outbox"
+    outbox.mkdir()
+    # Missing "kind": the collector answers 400 for any batch containing it
+    (outbox / "0_bad.json").write_text(json.dumps({"id": "bad", "filename": "x.txt", "content": ""}))
+
+    data_path = tmp_path / "cv_data_1.txt"
+    data_path.write_text("Time (s)\tVoltage (V)\tCurrent (uA)\n0\t-1.0\t2.0\n")
+
+    url = f"http://127.0.0.1:{collector.server_address[1]}"
+    uploader = RunUploader(url, station="bench-1", outbox_dir=str(outbox))
+    uploader.queue_run(str(data_path))
+    uploader.queue_responses({"intro_reflection": "ions move"})
+
+    assert wait_for(lambda: not uploader.pending())
+    uploader.stop()
+
+    assert os.path.exists(outbox / "0_bad.json.bad")
+    kinds = sorted(item["kind"] for item in collector.store.list_items(station="bench-1"))
+    assert kinds == ["responses", "run"]
+
+
+def test_same_filename_items_do_not_overwrite(collector):
+    store = collector.store
+    for item_id, content in (("id1", "first"), ("id2", "second")):
+        store.add("07", {"id": item_id, "kind": "run", "filename": "cv_data_20260101_120000.txt",
+                         "content": content})
+
+    items = store.list_items(station="07")
+    assert len(items) == 2
+    assert len({item["path"] for item in items}) == 2
+    contents = set()
+    for item in items:
+        with open(os.path.join(store.store_dir, item["path"])) as f:
+            contents.add(f.read())
+    assert contents == {"first", "second"}
+
+
+def test_retried_item_is_stored_once(collector):
+    item = {"id": "abc", "kind": "run", "filename": "cv_data_1.txt", "content": "x"}
+    assert collector.store.add("bench-1", item)
+    assert not collector.store.add("bench-1", item)
+    assert len(collector.store.list_items()) == 1
+
+
+def test_misconfigured_collector_url_keeps_items_queued(collector, tmp_path):
+    outbox = tmp_path / "outbox"
+    # Wrong path on a live server answers 404, which must not be mistaken for a bad item
+    url = f"http://127.0.0.1:{collector.server_address[1]}/wrong"
+    uploader = RunUploader(url, station="bench-1", outbox_dir=str(outbox))
+    uploader.queue_responses({"intro_reflection": "ions move"})
+
+    assert wait_for(lambda: uploader.last_error is not None)
+    uploader.stop()
+
+    assert getattr(uploader.last_error, "code", None) == 404
+    assert len(uploader.pending()) == 1
+    assert not any(name.endswith(".bad") for name in os.listdir(outbox))
+
+
+def test_storage_failure_is_a_server_error_and_retried(collector, tmp_path, monkeypatch):
+    def disk_full(station, item):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(collector.store, "add", disk_full)
+
+    outbox = tmp_path / "outbox"
+    url = f"http://127.0.0.1:{collector.server_address[1]}"
+    uploader = RunUploader(url, station="bench-1", outbox_dir=str(outbox))
+    uploader.queue_responses({"intro_reflection": "ions move"})
+
+    assert wait_for(lambda: uploader.last_error is not None)
+    uploader.stop()
+
+    assert getattr(uploader.last_error, "code", None) == 500
+    assert len(uploader.pending()) == 1
+    assert not any(name.endswith(".bad") for name in os.listdir(outbox))
@@ -0,0 +1,90 @@
+import numpy as np
+import os
+from runRadiostat.compare_cv import RunComparison, load_sweeps, resample_sweeps, rising_mask
+
+
+def write_run(path, volt_min, volt_max, n=200):
+    t = np.linspace(0, 2, n)
+    half = n // 2
+    volt = np.r_[np.linspace(volt_max, volt_min, half), np.linspace(volt_min, volt_max, n - half)]
+    curr = 1000 * np.sin(4 * volt)
+    with open(path, 'w') as f:
+        f.write('Time (s)\tVoltage (V)\tCurrent (uA)\n')
+        for row in zip(t, volt, curr):
+            f.write('\t'.join(map(str, row)) + '\n')
+    return str(path)
+
+
+def test_resample_matches_per_run_interp():
+    rng = np.random.default_rng(0)
+    sweeps = []
+    for k in range(50):
+        v = np.sort(rng.uniform(-1.2 + 0.05 * rng.random(), -0.4, 100 + k))
+        sweeps.append((v, np.cos(3 * v) + k))
+    grid = np.linspace(-1.2, -0.4, 80)
+
+    expected = np.array([
+        np.where((grid < v[0]) | (grid > v[-1]), np.nan, np.interp(grid, v, c)) for v, c in sweeps
+    ])
+    np.testing.assert_allclose(resample_sweeps(sweeps, grid), expected, equal_nan=True)
+
+
+def test_cache_drops_stale_grids_and_clear_empties_it(tmp_path):
+    comparison = RunComparison(grid_points=50)
+    for k in range(5):
+        # Each run widens the voltage span, so every call moves to a new grid
+        comparison.add_runs([write_run(tmp_path / f'cv_data_{k}.txt', -1.0 - 0.05 * k, -0.4)])
+        grid, curves = comparison.resampled('cathodic')
+        assert curves.shape == (k + 1, 50)
+        assert len(comparison._resampled) == k + 1
+
+    comparison.resampled('anodic')
+    assert len(comparison._resampled) == 10
+
+    comparison.clear()
+    assert comparison._sweeps == {}
+    assert comparison._resampled == {}
+
+
+def test_noisy_slow_sweep_splits_at_turning_point(tmp_path):
+    # 0.05 V/s at 100 samples/s: 0.5 mV steps, the same size as the measurement noise
+    rng = np.random.default_rng(0)
+    volt_true = np.r_[np.arange(-0.4, -1.2, -0.0005), np.arange(-1.2, -0.4, 0.0005)]
+    volt = volt_true + rng.normal(0, 0.0005, len(volt_true))
+    turn = int(np.argmin(volt_true))
+
+    rising = rising_mask(volt)
+    # Only samples right around the turn may be assigned either way
+    wrong = np.flatnonzero(rising != (np.arange(len(volt)) > turn))
+    assert np.all(np.abs(wrong - turn) < 100)
+
+    path = tmp_path / 'cv_data_slow.txt'
+    with open(path, 'w') as f:
+        f.write('Time (s)\tVoltage (V)\tCurrent (uA)\n')
+        for k, v in enumerate(volt):
+            f.write(f'{k / 100}\t{v}\t{1000.0 if k > turn else -1000.0}\n')
+    sweeps = load_sweeps(str(path))
+    # Cathodic (first, falling) sweep carries the negative plating current
+    assert np.mean(sweeps['cathodic'][1] < 0) > 0.95
+    assert np.mean(sweeps['anodic'][1] > 0) > 0.95
+
+
+def test_multi_cycle_turning_points():
+    cycle = np.r_[np.linspace(-0.4, -1.2, 100), np.linspace(-1.2, -0.4, 100)[1:]]
+    volt = np.r_[cycle, cycle[1:], cycle[1:]]
+    rising = rising_mask(volt)
+    assert np.array_equal(rising, np.r_[False, np.diff(volt) > 0])
+
+
+def test_missing_run_is_dropped_and_reported(tmp_path):
+    comparison = RunComparison(grid_points=50)
+    kept = write_run(tmp_path / 'cv_data_0.txt', -1.2, -0.4)
+    gone = write_run(tmp_path / 'cv_data_1.txt', -1.2, -0.4)
+    comparison.add_runs([kept, gone])
+    assert comparison.resampled('cathodic')[1].shape == (2, 50)
+
+    os.remove(gone)
+    grid, curves = comparison.resampled('cathodic')
+    assert curves.shape == (1, 50)
+    assert comparison.paths == [kept]
+    assert comparison.missing == [gone]
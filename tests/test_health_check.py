@@ -0,0 +1,70 @@
+import os
+import time
+import pytest
+from runRadiostat import simulated_device
+from runRadiostat.health_check import check_device, check_all_devices, format_report
+from runRadiostat.simulated_device import SimulatedPotentiostat
+
+
+def open_fds_to(path):
+    fd_dir = '/proc/self/fd'
+    count = 0
+    for fd in os.listdir(fd_dir):
+        try:
+            if os.readlink(os.path.join(fd_dir, fd)) == path:
+                count += 1
+        except OSError:
+            pass
+    return count
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd') or not hasattr(os, 'openpty'),
+                    reason='needs a pseudo-terminal and /proc')
+def test_port_is_closed_when_firmware_does_not_answer():
+    # A pty opens like a serial port but nothing on the other end answers the variant query
+    master, slave = os.openpty()
+    port = os.ttyname(slave)
+    try:
+        result = check_device(port)
+        assert not result['ok']
+        assert result['error']
+        assert open_fds_to(port) == 1   # only the test's own slave fd is left
+    finally:
+        os.close(slave)
+        os.close(master)
+
+
+class SlowDevice(SimulatedPotentiostat):
+    delay = 0.3
+
+    def run_test(self, testname, **kwargs):
+        time.sleep(self.delay)
+        return super().run_test(testname, **kwargs)
+
+
+class MuxDevice(SimulatedPotentiostat):
+    def run_test(self, testname, **kwargs):
+        t, volt, curr = super().run_test(testname, **kwargs)
+        return {chan: {'t': t, 'v': volt, 'i': curr} for chan in (1, 3)}
+
+
+def test_devices_are_checked_concurrently(monkeypatch):
+    monkeypatch.setattr(simulated_device, 'SimulatedPotentiostat', SlowDevice)
+    ports = [f'bench-{k}' for k in range(6)]
+
+    start = time.monotonic()
+    results = check_all_devices(ports, simulate=True)
+    elapsed = time.monotonic() - start
+
+    assert [r['port'] for r in results] == ports
+    assert all(r['ok'] for r in results)
+    # A serial loop would take 6 x 0.3 s
+    assert elapsed < 2 * SlowDevice.delay
+
+
+def test_multiplexer_results_are_handled(monkeypatch):
+    monkeypatch.setattr(simulated_device, 'SimulatedPotentiostat', MuxDevice)
+    result = check_device('bench-1', simulate=True)
+    assert result['ok'], result['error']
+    assert result['channels'] == [1, 3]
+    assert 'mux channels 1, 3' in format_report([result])
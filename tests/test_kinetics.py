@@ -0,0 +1,143 @@
+import json
+import numpy as np
+import pandas as pd
+from runRadiostat.collector import RunStore
+from runRadiostat.kinetics import FITS, batched_linear_fit, fit_scan_rate_series, load_scan_rate_table
+from runRadiostat.simulated_device import SimulatedPotentiostat
+
+
+def make_table(groups):
+    """groups: {(cell, electrolyte): [scan rates]} -> table shaped like load_scan_rate_table's"""
+    rng = np.random.default_rng(0)
+    rows = []
+    for (cell, electrolyte), rates in groups.items():
+        for rate in rates:
+            rows.append({
+                'cell': cell,
+                'electrolyte': electrolyte,
+                'volt_per_sec': rate,
+                'ip_ox': 2.3 * np.sqrt(rate) + rng.normal(0, 0.02),
+                'Ep_ox': -0.82 + 0.03 * np.log10(rate) + rng.normal(0, 0.002),
+                'ip_red': -2.6 * np.sqrt(rate) + rng.normal(0, 0.02),
+                'Ep_red': -1.08 - 0.03 * np.log10(rate) + rng.normal(0, 0.002),
+            })
+    table = pd.DataFrame(rows)
+    table['sqrt_rate'] = np.sqrt(table['volt_per_sec'])
+    table['log10_rate'] = np.log10(table['volt_per_sec'])
+    return table
+
+
+def test_replicates_at_one_scan_rate_give_nan():
+    # Rounding in the centred sums used to leave these slightly positive
+    for rate in (0.7, 0.15, 0.3, 1.0):
+        for n_runs in range(2, 12):
+            fits = fit_scan_rate_series(make_table({('bench-1', 'ZnSO4'): [rate] * n_runs}))
+            assert fits['n_runs'].tolist() == [n_runs]
+            for name, x_col, y_col in FITS:
+                assert np.isnan(fits[f'{name}_slope'][0]), (rate, n_runs, name)
+                assert np.isnan(fits[f'{name}_intercept'][0]), (rate, n_runs, name)
+                assert np.isnan(fits[f'{name}_r2'][0]), (rate, n_runs, name)
+
+
+def test_mixed_groups_match_polyfit():
+    groups = {
+        ('bench-1', 'ZnSO4'): [0.05, 0.1, 0.2, 0.5, 1.0],
+        ('bench-1', 'ZnCl2'): [0.7, 0.7, 0.7],
+        ('bench-2', 'ZnSO4'): [0.1, 0.1, 0.4, 0.4, 0.9],
+        ('bench-3', 'Zn(OTf)2'): [0.3],
+        ('bench-4', 'ZnCl2'): [0.02, 2.0],
+    }
+    table = make_table(groups)
+    fits = fit_scan_rate_series(table).set_index(['cell', 'electrolyte'])
+
+    for key, rates in groups.items():
+        rows = table[(table['cell'] == key[0]) & (table['electrolyte'] == key[1])]
+        fit = fits.loc[key]
+        assert fit['n_runs'] == len(rates)
+        for name, x_col, y_col in FITS:
+            x, y = rows[x_col].to_numpy(), rows[y_col].to_numpy()
+            if len(np.unique(x)) < 2:
+                assert np.isnan(fit[f'{name}_slope'])
+                continue
+            slope, intercept = np.polyfit(x, y, 1)
+            r2 = np.corrcoef(x, y)[0, 1] ** 2
+            np.testing.assert_allclose(fit[f'{name}_slope'], slope, rtol=1e-8)
+            np.testing.assert_allclose(fit[f'{name}_intercept'], intercept, rtol=1e-8, atol=1e-12)
+            np.testing.assert_allclose(fit[f'{name}_r2'], r2, rtol=1e-8)
+
+
+def test_batched_fit_many_groups():
+    rng = np.random.default_rng(1)
+    groups = rng.integers(0, 1000, 10000)
+    x = rng.random(10000)
+    y = 3 * x + 0.01 * groups + rng.normal(0, 0.1, 10000)
+    slope, intercept, r2, n = batched_linear_fit(groups, x, y)
+
+    for g in (0, 417, 999):
+        mask = groups == g
+        expected_slope, expected_intercept = np.polyfit(x[mask], y[mask], 1)
+        np.testing.assert_allclose([slope[g], intercept[g]], [expected_slope, expected_intercept], rtol=1e-8)
+        assert n[g] == mask.sum()
+
+
+def cv_file_content(volt_per_sec, seed):
+    dev = SimulatedPotentiostat(seed=seed)
+    dev.set_curr_range('10000uA')
+    dev.set_sample_rate(100.0)
+    t, volt, curr = dev.run_test('cyclic', param={
+        'quietValue': 0.0, 'quietTime': 0, 'amplitude': 0.4, 'offset': -0.8,
+        'period': int(1000 * 4 * 0.4 / volt_per_sec), 'numCycles': 1, 'shift': 0.5,
+    }, display=None)
+    lines = ['Time (s)\tVoltage (V)\tCurrent (uA)']
+    lines += [f'{a}\t{b}\t{c}' for a, b, c in zip(t, volt, curr)]
+    return '\n'.join(lines) + '\n'
+
+
+def test_runs_from_the_collector_store_are_fitted(tmp_path):
+    store = RunStore(str(tmp_path))
+    rates = [0.1, 0.2, 0.5, 1.0]
+    for station, cell in (('bench-1', 'cell A'), ('bench-2', None)):
+        for k, rate in enumerate(rates):
+            store.add(station, {
+                'id': f'{station}-{k}', 'kind': 'run', 'filename': 'cv_data_20250101_120000.txt',
+                'content': cv_file_content(rate, seed=k),
+                'metadata': {'cell': cell, 'electrolyte': 'ZnSO4', 'volt_per_sec': rate},
+            })
+    paths = [str(tmp_path / item['path']) for item in store.list_items(kind='run')]
+
+    skipped = []
+    table = load_scan_rate_table(paths, skipped)
+    fits = fit_scan_rate_series(table).set_index('cell')
+
+    assert skipped == []
+    # The station without a cell name is its own group, not pooled with anything else
+    assert sorted(fits.index) == ['bench-2', 'cell A']
+    assert (fits['n_runs'] == len(rates)).all()
+    assert (fits['ip_ox_vs_sqrt_rate_r2'] > 0.9).all()
+
+
+def test_runs_that_cannot_be_grouped_are_skipped(tmp_path):
+    content = cv_file_content(0.5, seed=0)
+    metadata = {
+        'old': None,
+        'no_electrolyte': {'cell': 'cell A', 'volt_per_sec': 0.5},
+        'no_cell': {'electrolyte': 'ZnSO4', 'volt_per_sec': 0.5},
+        'ok': {'cell': 'cell A', 'electrolyte': 'ZnSO4', 'volt_per_sec': 0.5},
+    }
+    paths = []
+    for name, meta in metadata.items():
+        path = tmp_path / f'{name}.txt'
+        path.write_text(content)
+        if meta is not None:
+            (tmp_path / f'{name}.json').write_text(json.dumps(meta))
+        paths.append(str(path))
+
+    skipped = []
+    table = load_scan_rate_table(paths, skipped)
+
+    assert list(table['path']) == [str(tmp_path / 'ok.txt')]
+    assert skipped == [
+        (str(tmp_path / 'old.txt'), 'no recorded scan rate'),
+        (str(tmp_path / 'no_electrolyte.txt'), 'no electrolyte'),
+        (str(tmp_path / 'no_cell.txt'), 'no cell or station'),
+    ]